@@ -3,23 +3,49 @@ Database module for Library Management System
 Handles all database operations and connections
 """
 
+import os
 import sqlite3
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple
 
-# Database configuration
-DATABASE = 'library.db'
+# Database configuration (LIBRARY_DB_PATH overrides the default file, e.g. per test worker)
+DATABASE = os.environ.get('LIBRARY_DB_PATH', 'library.db')
+
+# Bumped by every helper in this module that writes to books, so cached catalog reads
+# (see services.library_service search cache) can tell they are stale. Raw SQL and
+# writes from other processes are not tracked.
+_catalog_version = 0
+
+def _bump_catalog_version():
+    global _catalog_version
+    _catalog_version += 1
+
+def get_catalog_version() -> int:
+    """Return a counter that changes whenever this process writes to the books table."""
+    return _catalog_version
+
+def _apply_test_pragmas(conn):
+    """Trade durability for speed on throwaway test databases (enabled by LIBRARY_TEST_MODE=1)."""
+    # Per-connection settings only; journal_mode persists in the file and is set by init_database()
+    conn.execute("PRAGMA synchronous=OFF")
+    conn.execute("PRAGMA temp_store=MEMORY")
 
 def get_db_connection():
     """Get a database connection."""
     conn = sqlite3.connect(DATABASE)
     conn.row_factory = sqlite3.Row  # This enables column access by name
+    if os.environ.get("LIBRARY_TEST_MODE") == "1":
+        _apply_test_pragmas(conn)
     return conn
 
 def init_database():
     """Initialize the database with required tables."""
     conn = get_db_connection()
     
+    # WAL is a property of the database file, so it only needs setting once
+    if os.environ.get("LIBRARY_TEST_MODE") == "1":
+        conn.execute("PRAGMA journal_mode=WAL")
+    
     # Create books table
     conn.execute('''
         CREATE TABLE IF NOT EXISTS books (
@@ -45,6 +71,15 @@ def init_database():
         )
     ''')
     
+    # Index catalog listing order (get_all_books sorts by title)
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_books_title ON books(title)')
+    
+    # Partial index over active borrows; every patron lookup filters on return_date IS NULL
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_borrow_active
+        ON borrow_records(patron_id, book_id) WHERE return_date IS NULL
+    ''')
+    
     conn.commit()
     conn.close()
 
@@ -61,11 +96,10 @@ def add_sample_data():
             ('1984', 'George Orwell', '9780451524935', 1)
         ]
         
-        for title, author, isbn, copies in sample_books:
-            conn.execute('''
-                INSERT INTO books (title, author, isbn, total_copies, available_copies)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (title, author, isbn, copies, copies))
+        conn.executemany('''
+            INSERT INTO books (title, author, isbn, total_copies, available_copies)
+            VALUES (?, ?, ?, ?, ?)
+        ''', [(title, author, isbn, copies, copies) for title, author, isbn, copies in sample_books])
         
         # Make 1984 unavailable by adding a borrow record
         conn.execute('''
@@ -79,6 +113,7 @@ def add_sample_data():
         conn.execute('UPDATE books SET available_copies = 0 WHERE id = 3')
         
         conn.commit()
+        _bump_catalog_version()
     
     conn.close()
 
@@ -117,15 +152,17 @@ def get_patron_borrowed_books(patron_id: str) -> List[Dict]:
     ''', (patron_id,)).fetchall()
     conn.close()
     
+    now = datetime.now()
     borrowed_books = []
     for record in records:
+        due_date = datetime.fromisoformat(record['due_date'])
         borrowed_books.append({
             'book_id': record['book_id'],
             'title': record['title'],
             'author': record['author'],
             'borrow_date': datetime.fromisoformat(record['borrow_date']),
-            'due_date': datetime.fromisoformat(record['due_date']),
-            'is_overdue': datetime.now() > datetime.fromisoformat(record['due_date'])
+            'due_date': due_date,
+            'is_overdue': now > due_date
         })
     
     return borrowed_books
@@ -140,16 +177,33 @@ def get_patron_borrow_count(patron_id: str) -> int:
     conn.close()
     return count
 
-def insert_book(title: str, author: str, isbn: str, total_copies: int, available_copies: int) -> bool:
-    """Insert a new book into the database."""
+def insert_book(title: str, author: str, isbn: str, total_copies: int, available_copies: int) -> Optional[int]:
+    """Insert a new book into the database. Returns the new book's ID, or None on failure."""
     conn = get_db_connection()
     try:
-        conn.execute('''
+        cursor = conn.execute('''
             INSERT INTO books (title, author, isbn, total_copies, available_copies)
             VALUES (?, ?, ?, ?, ?)
         ''', (title, author, isbn, total_copies, available_copies))
         conn.commit()
         conn.close()
+        _bump_catalog_version()
+        return cursor.lastrowid
+    except Exception as e:
+        conn.close()
+        return None
+
+def bulk_insert_books(books: List[Tuple[str, str, str, int, int]]) -> bool:
+    """Insert many books in one transaction; each row is (title, author, isbn, total_copies, available_copies)."""
+    conn = get_db_connection()
+    try:
+        conn.executemany('''
+            INSERT INTO books (title, author, isbn, total_copies, available_copies)
+            VALUES (?, ?, ?, ?, ?)
+        ''', books)
+        conn.commit()
+        conn.close()
+        _bump_catalog_version()
         return True
     except Exception as e:
         conn.close()
@@ -179,6 +233,7 @@ def update_book_availability(book_id: int, change: int) -> bool:
         ''', (change, book_id))
         conn.commit()
         conn.close()
+        _bump_catalog_version()
         return True
     except Exception as e:
         conn.close()
@@ -199,3 +254,30 @@ def update_borrow_record_return_date(patron_id: str, book_id: int, return_date:
     except Exception as e:
         conn.close()
         return False
+
+def bulk_return_books(returns: List[Tuple[str, int]], return_date: datetime) -> bool:
+    """
+    Return many (patron_id, book_id) borrows in one transaction.
+    A copy is restored only for rows that closed an active borrow; returns False if none did.
+    """
+    conn = get_db_connection()
+    try:
+        returned = 0
+        for patron_id, book_id in returns:
+            cursor = conn.execute('''
+                UPDATE borrow_records 
+                SET return_date = ? 
+                WHERE patron_id = ? AND book_id = ? AND return_date IS NULL
+            ''', (return_date.isoformat(), patron_id, book_id))
+            if cursor.rowcount > 0:
+                conn.execute('''
+                    UPDATE books SET available_copies = available_copies + ? WHERE id = ?
+                ''', (cursor.rowcount, book_id))
+                returned += cursor.rowcount
+        conn.commit()
+        conn.close()
+        _bump_catalog_version()
+        return returned > 0
+    except Exception as e:
+        conn.close()
+        return False
@@ -3,15 +3,31 @@ Library Service Module - Business Logic Functions
 Contains all the core business logic for the Library Management System
 """
 
+import threading
+from collections import OrderedDict
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple
 from database import (
     get_book_by_id, get_book_by_isbn, get_patron_borrow_count,
     insert_book, insert_borrow_record, update_book_availability,
-    update_borrow_record_return_date, get_all_books, get_patron_borrowed_books
+    update_borrow_record_return_date, get_all_books, get_patron_borrowed_books,
+    get_catalog_version
 )
 from services.payment_service import PaymentGateway
 
+# LRU cache of search results keyed on (term, search_type, catalog version).
+# database bumps the version on every books write it makes, so stale entries never
+# match; raw SQL or other processes writing the same file are not seen.
+_SEARCH_CACHE_MAX = 256
+_SEARCH_CACHE: "OrderedDict[tuple, List[Dict]]" = OrderedDict()
+# The Flask dev server is threaded; guards every read, insert and eviction above
+_SEARCH_CACHE_LOCK = threading.Lock()
+
+def clear_search_cache() -> None:
+    """Drop cached search results (call after writing to the catalog with raw SQL)."""
+    with _SEARCH_CACHE_LOCK:
+        _SEARCH_CACHE.clear()
+
 def add_book_to_catalog(title: str, author: str, isbn: str, total_copies: int) -> Tuple[bool, str]:
     """
     Add a new book to the catalog.
@@ -201,6 +217,17 @@ def calculate_late_fee_for_book(patron_id: str, book_id: int) -> Dict:
     }
     
 
+# Per-type match predicates, called with the normalized search term and a book row.
+# Title/author terms arrive lowercased; ISBN terms are only stripped.
+_SEARCH_MATCHERS = {
+    # Case-insensitive partial matching for title
+    "title": lambda term, book: term in book['title'].lower(),
+    # Case-insensitive partial matching for author
+    "author": lambda term, book: term in book['author'].lower(),
+    # Exact match for ISBN
+    "isbn": lambda term, book: term == book['isbn'],
+}
+
 def search_books_in_catalog(search_term: str, search_type: str) -> List[Dict]:
     
     """
@@ -209,35 +236,33 @@ def search_books_in_catalog(search_term: str, search_type: str) -> List[Dict]:
     Implement R6 as per requirements
     """
     # Validate search_type
-    if search_type not in ["title", "author", "isbn"]:
+    matches = _SEARCH_MATCHERS.get(search_type)
+    if matches is None:
         return []
     
     # Validate search_term is not empty/whitespace
     if not search_term or not search_term.strip():
         return []
     
-    # Retrieve all books
-    all_books = get_all_books()
-    
-    # Filter books based on search_type
-    matching_books = []
-    search_term_lower = search_term.strip().lower()
-    
-    for book in all_books:
-        if search_type == "title":
-            # Case-insensitive partial matching for title
-            if search_term_lower in book['title'].lower():
-                matching_books.append(book)
-        elif search_type == "author":
-            # Case-insensitive partial matching for author
-            if search_term_lower in book['author'].lower():
-                matching_books.append(book)
-        elif search_type == "isbn":
-            # Exact match for ISBN
-            if search_term.strip() == book['isbn']:
-                matching_books.append(book)
-    
-    return matching_books
+    # Title/author matching is case-insensitive, so share one entry across casings
+    key_term = search_term.strip() if search_type == "isbn" else search_term.strip().lower()
+    cache_key = (key_term, search_type, get_catalog_version())
+    with _SEARCH_CACHE_LOCK:
+        cached = _SEARCH_CACHE.get(cache_key)
+        if cached is not None:
+            _SEARCH_CACHE.move_to_end(cache_key)
+    
+    if cached is None:
+        # Retrieve all books and filter them with the search_type's predicate
+        # (outside the lock, so a slow query doesn't block cache hits)
+        cached = [book for book in get_all_books() if matches(key_term, book)]
+        with _SEARCH_CACHE_LOCK:
+            _SEARCH_CACHE[cache_key] = cached
+            if len(_SEARCH_CACHE) > _SEARCH_CACHE_MAX:
+                _SEARCH_CACHE.popitem(last=False)
+    
+    # Copy each book so callers can't mutate the cached rows
+    return [dict(book) for book in cached]
 
 def get_patron_status_report(patron_id: str) -> Dict:
     """
@@ -255,10 +280,10 @@ def get_patron_status_report(patron_id: str) -> Dict:
     # Calculate total late fees and prepare borrowed books details
     total_late_fees = 0.00
     borrowed_books_details = []
+    current_date = datetime.now()
     
     for borrowed_book in borrowed_books:
         # Calculate late fee for this book
-        current_date = datetime.now()
         due_date = borrowed_book['due_date']
         days_overdue = (current_date - due_date).days
         
@@ -0,0 +1,152 @@
+"""
+Shared pytest configuration for the Library Management System test suite
+"""
+
+import os
+import sqlite3
+from unittest.mock import Mock
+
+import pytest
+
+import database
+import services.library_service as library_service
+from services.payment_service import PaymentGateway
+
+
+@pytest.fixture(scope="session", autouse=True)
+def worker_database(tmp_path_factory):
+    """
+    Give each pytest-xdist worker its own SQLite file so workers never share library.db.
+    The file lives under pytest's per-session temp directory, so nothing is left in the
+    working tree and no manual removal is needed.
+    """
+    worker_id = os.environ.get("PYTEST_XDIST_WORKER", "gw0")
+    db_path = str(tmp_path_factory.mktemp(f"db_{worker_id}") / "library.db")
+    
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setenv("LIBRARY_DB_PATH", db_path)
+        mp.setattr(database, 'DATABASE', db_path)
+        # Test data is throwaway, so file-backed connections skip durable commits
+        mp.setenv("LIBRARY_TEST_MODE", "1")
+        yield db_path
+
+
+@pytest.fixture(autouse=True)
+def fresh_search_cache():
+    """Each test rebuilds or rolls back its database, so drop any cached search results first"""
+    library_service.clear_search_cache()
+
+
+class _SharedConnection:
+    """
+    Proxy for the session's single SQLite connection.
+    commit() and close() are no-ops so every write stays inside the per-test
+    SAVEPOINT until memory_db rolls it back.
+    """
+    
+    def __init__(self, conn):
+        self._conn = conn
+    
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+    
+    def commit(self):
+        pass
+    
+    def close(self):
+        pass
+
+
+def _clone_connection(template):
+    """Copy the template database into a new in-memory connection, wrapped for sharing"""
+    conn = sqlite3.connect(':memory:')
+    template.backup(conn)
+    conn.row_factory = sqlite3.Row
+    return _SharedConnection(conn)
+
+
+@pytest.fixture(scope="session")
+def db_template():
+    """Run the schema DDL and sample seeding once per session into a pristine in-memory template"""
+    conn = sqlite3.connect(':memory:')
+    conn.row_factory = sqlite3.Row
+    shared = _SharedConnection(conn)
+    
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(database, 'get_db_connection', lambda: shared)
+        database.init_database()
+        database.add_sample_data()
+    conn.commit()
+    
+    yield conn
+    
+    conn.close()
+
+
+@pytest.fixture(scope="session")
+def seeded_connection(db_template):
+    """The seeded database shared by every test in the session, behind one connection"""
+    shared = _clone_connection(db_template)
+    
+    yield shared
+    
+    shared._conn.close()
+
+
+@pytest.fixture(autouse=True)
+def memory_db(request, monkeypatch):
+    """
+    Run a test inside a SAVEPOINT on the shared in-memory connection and roll it back afterwards.
+    Tests marked readonly share the seeded state directly and skip the savepoint;
+    tests marked fresh_db get their own copy of the pristine template instead;
+    tests marked no_db get no database at all.
+    """
+    if request.node.get_closest_marker("no_db"):
+        yield None
+        return
+    
+    if request.node.get_closest_marker("fresh_db"):
+        fresh = _clone_connection(request.getfixturevalue("db_template"))
+        monkeypatch.setattr(database, 'get_db_connection', lambda: fresh)
+        yield fresh
+        fresh._conn.close()
+        return
+    
+    seeded_connection = request.getfixturevalue("seeded_connection")
+    monkeypatch.setattr(database, 'get_db_connection', lambda: seeded_connection)
+    if request.node.get_closest_marker("readonly"):
+        yield seeded_connection
+        return
+    
+    seeded_connection.execute("SAVEPOINT test_sp")
+    
+    yield seeded_connection
+    
+    seeded_connection.execute("ROLLBACK TO test_sp")
+    seeded_connection.execute("RELEASE test_sp")
+
+
+@pytest.fixture
+def stub_fee_and_book(monkeypatch):
+    """Return a helper that stubs the fee calculation and book lookup pay_late_fees relies on."""
+    def _apply(fee, book):
+        monkeypatch.setattr(library_service, 'calculate_late_fee_for_book', lambda *a, **k: fee)
+        monkeypatch.setattr(library_service, 'get_book_by_id', lambda *a, **k: book)
+    return _apply
+
+
+# PaymentGateway's public methods, read once so each mock skips re-introspecting the class
+_GATEWAY_SPEC = [name for name in dir(PaymentGateway) if not name.startswith('_')]
+
+
+@pytest.fixture(scope="module")
+def _gateway_shared():
+    """One PaymentGateway mock per module; spec_set rejects methods the real gateway lacks."""
+    return Mock(spec_set=_GATEWAY_SPEC)
+
+
+@pytest.fixture
+def mock_gateway(_gateway_shared):
+    """The shared gateway mock with its calls, return values and side effects cleared."""
+    _gateway_shared.reset_mock(return_value=True, side_effect=True)
+    return _gateway_shared